@@ -8,8 +8,16 @@
 # ----------------------------------------------------------------------------
 
 import logging
+import numpy as np
 import pandas as pd
 
+# Translation table used by fix_id(). Note that we don't bother replacing
+# quotes -- we just remove them (mapping a character to None in str.maketrans()
+# means that str.translate() will delete that character).
+_FIX_ID_TABLE = str.maketrans(
+    {".": ":", "]": ")", "[": "(", "'": None, '"': None, "\\": "|"}
+)
+
 
 def ensure_df_headers_unique(df, df_name):
     """Raises an error if the index or columns of the DataFrame aren't unique.
@@ -28,12 +36,12 @@ def ensure_df_headers_unique(df, df_name):
            The "name" of the DataFrame -- this is displayed to the user in the
            error message thrown if the DataFrame has any non-unique IDs.
     """
-    if len(df.index.unique()) != df.shape[0]:
+    if not df.index.is_unique:
         raise ValueError(
             "Indices of the {} DataFrame are not" " unique.".format(df_name)
         )
 
-    if len(df.columns.unique()) != df.shape[1]:
+    if not df.columns.is_unique:
         raise ValueError(
             "Columns of the {} DataFrame are not" " unique.".format(df_name)
         )
@@ -66,32 +74,17 @@ def fix_id(fid):
        with various field names.
 
        See https://github.com/vega/vega-lite/issues/4965.
-    """
 
-    new_id = ""
-    for c in fid:
-        if c == ".":
-            new_id += ":"
-        elif c == "]":
-            new_id += ")"
-        elif c == "[":
-            new_id += "("
-        elif c == "'" or c == '"':
-            # Don't bother replacing quotes
-            pass
-        elif c == "\\":
-            new_id += "|"
-        else:
-            new_id += c
-    return new_id
+       The actual replacements done are defined in _FIX_ID_TABLE; using
+       str.translate() means we don't have to build up the escaped ID one
+       character at a time.
+    """
+    return fid.translate(_FIX_ID_TABLE)
 
 
 def escape_columns(df, df_name):
     """Calls str() then fix_id() on each of the column names of the DF."""
-    new_cols = []
-    for col in df.columns:
-        new_cols.append(fix_id(str(col)))
-    df.columns = new_cols
+    df.columns = [fix_id(str(col)) for col in df.columns]
     # Ensure that this didn't make the column names non-unique
     ensure_df_headers_unique(df, df_name)
     return df
@@ -440,31 +433,48 @@ def merge_feature_metadata(feature_ranks, feature_metadata=None):
     return output_feature_data, feature_metadata_cols
 
 
-def sparsify_count_dict(count_dict):
-    """Returns a "sparse" representation of a dict of counts data.
+def table_to_sparse_count_dict(table_sdf):
+    """Returns a "sparse" dict representation of a table's count data.
 
-       We expect that the input dict is of the format {feature ID: {sample ID:
-       count, sample 2 ID: count, ...}, ...}. In theory you could also totally
-       pass in a transposed dict here (where samples are the "outer layer" of
-       the dict), but the variable names would need to be flipped to make this
-       function make sense. (See #175 on GitHub for context.)
+       The output of this is of the format {feature ID: {sample ID: count,
+       sample 2 ID: count, ...}, ...}, where only nonzero counts are
+       included. (Every feature ID in the table will be included in the
+       output, even if it doesn't have any nonzero counts.) See #175 on GitHub
+       for context.
 
-       Anyway, this function returns the input dict, but without references to
-       0-count samples for a given feature. (Since we filter out empty
-       features, we expect that every feature should have at least one sample
-       with a nonzero count of that feature.)
+       We avoid calling .to_dict() on the table, since that has to go through
+       every entry in the table, even though most of these entries are
+       usually zeros. Instead, if table_sdf is a SparseDataFrame we just look
+       at its nonzero entries (via SparseDataFrame.to_coo()). If table_sdf is
+       a normal DataFrame, we use np.nonzero() on its values.
+
+       Parameters
+       ----------
+
+       table_sdf: pd.SparseDataFrame (or pd.DataFrame)
+            Representation of a BIOM table containing count data. The index
+            contains feature IDs, and the columns contain sample IDs.
     """
-    logging.debug("Sparsifying count data.")
-    sparse_count_dict = {}
-    for feature_id, sample_counts in count_dict.items():
-        # This will be the new sample_counts dict for this feature ID, but only
-        # containing sample IDs with nonzero counts.
-        fdict = {}
-        for sample_id, count in sample_counts.items():
-            if count != 0:
-                fdict[sample_id] = count
-        sparse_count_dict[feature_id] = fdict
-    logging.debug("Done sparsifying count data.")
+    logging.debug("Creating sparse count data.")
+    if isinstance(table_sdf, pd.SparseDataFrame):
+        coo = table_sdf.to_coo()
+        nonzero = coo.data != 0
+        row_indices = coo.row[nonzero]
+        col_indices = coo.col[nonzero]
+        counts = coo.data[nonzero]
+    else:
+        values = table_sdf.values
+        row_indices, col_indices = np.nonzero(values)
+        counts = values[row_indices, col_indices]
+
+    feature_ids = list(table_sdf.index)
+    sample_ids = list(table_sdf.columns)
+    sparse_count_dict = {feature_id: {} for feature_id in feature_ids}
+    for r, c, count in zip(
+        row_indices.tolist(), col_indices.tolist(), counts.tolist()
+    ):
+        sparse_count_dict[feature_ids[r]][sample_ids[c]] = count
+    logging.debug("Done creating sparse count data.")
     return sparse_count_dict
 
 
@@ -325,7 +325,11 @@ def replace_js_json_definitions(
             )
         )
 
-    output_file_contents = ""
+    # We store the output file's lines in a list and then write them all at
+    # once, rather than repeatedly concatenating them onto a string. Since the
+    # lines containing JSONs can be huge for large datasets, repeated string
+    # concatenation can be pretty slow.
+    output_lines = []
     at_least_one_json_changed = False
     with open(input_file_loc, "r") as input_file_obj:
         # read in basic main.js contents. Replace everything after the {
@@ -347,14 +351,14 @@ def replace_js_json_definitions(
                 )
             if changed_yet:
                 at_least_one_json_changed = True
-            output_file_contents += output_line
+            output_lines.append(output_line)
 
     if at_least_one_json_changed:
         if output_file_loc is None:
             output_file_loc = input_file_loc
 
         with open(output_file_loc, "w") as output_file_obj:
-            output_file_obj.write(output_file_contents)
+            output_file_obj.writelines(output_lines)
         return 0
     # Let the caller know that nothing was written to the output file location.
     # If this was called on a JS test then this perfectly normal, but if this
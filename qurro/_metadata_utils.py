@@ -7,12 +7,12 @@
 # The full license is in the file LICENSE.txt, distributed with this software.
 # ----------------------------------------------------------------------------
 
+import io
 import pandas as pd
 import numpy as np
-from io import StringIO
 
 
-def get_q2_comment_lines(md_file_loc):
+def get_q2_comment_lines(file_obj):
     """Returns a list of line numbers in the file that start with "#q2:".
 
        These lines should be skipped when parsing the file outside of Q2 (i.e.
@@ -28,44 +28,77 @@ def get_q2_comment_lines(md_file_loc):
          that doesn't start with "#q2:". Currently, "#q2:types" is the only Q2
          "comment directive" available, but ostensibly this could detect future
          Q2 comment directives.
-        -This checks if md_file_loc is of type StringIO. If so, this will
-         handle it properly (iterating over it directly); otherwise, this
-         assumes that md_file_loc is an actual filename, and this will open
-         it using open().
-         (I realize that ideally this wouldn't have to do any type checking,
-         but it's either this or do a bunch of weird refactoring to get my test
-         code working.)
+        -file_obj should be a text-mode file-like object (e.g. a file opened
+         with "r", or a StringIO), so that lines are split using universal
+         newlines. Binary file objects should be wrapped in an
+         io.TextIOWrapper first. If you have a filename or a binary file
+         object, use read_tsv_without_q2_comments() -- that takes care of
+         this for you.
+        -After we're done looking for #q2: lines, this seeks file_obj back to
+         where it was when this function was called -- this way, the caller
+         can pass file_obj directly to pandas.read_csv() without having to
+         open the file again.
     """
+    start_pos = file_obj.tell()
+    q2_lines = []
+    line_num = 0
+    for line in file_obj:
+        # Don't check for a #q2: comment on the first line of the file,
+        # since the first line (should) define the file header.
+        if line_num > 0:
+            if line.startswith("#q2:"):
+                q2_lines.append(line_num)
+            else:
+                # We assume that all #q2: lines will occur at the start of
+                # the file. Once we've reached a line that doesn't start
+                # with "#q2:", we stop checking.
+                break
+        line_num += 1
+    # Allow us to read through this file object again --
+    # https://stackoverflow.com/a/27261215/10730311
+    file_obj.seek(start_pos)
+    return q2_lines
 
-    def iterate_over_file_obj_lines(file_obj):
-        q2_lines = []
-        line_num = 0
-        for line in file_obj:
-            # Don't check for a #q2: comment on the first line of the file,
-            # since the first line (should) define the file header.
-            if line_num > 0:
-                if line.startswith("#q2:"):
-                    q2_lines.append(line_num)
-                else:
-                    # We assume that all #q2: lines will occur at the start of
-                    # the file. Once we've reached a line that doesn't start
-                    # with "#q2:", we stop checking.
-                    break
-            line_num += 1
-        return q2_lines
-
-    if type(md_file_loc) == StringIO:
-        q2_lines = iterate_over_file_obj_lines(md_file_loc)
-        # HACK: Allow us to read through this StringIO again --
-        # https://stackoverflow.com/a/27261215/10730311
-        # Note that we're only ever bothering with StringIOs here during test
-        # code, so this weirdness should be ignored during normal operation of
-        # Qurro.
-        md_file_loc.seek(0)
-        return q2_lines
+
+def read_tsv_without_q2_comments(file_loc, **read_csv_kwargs):
+    """Reads a TSV file using pandas.read_csv(), skipping #q2: lines.
+
+       file_loc can be either a filename or a file-like object (anything with
+       a read() method). Either way, the file is only opened once: we look for
+       #q2: lines using get_q2_comment_lines() and then pass the same file
+       object on to pandas, rather than having pandas reopen the file.
+
+       If file_loc is a filename, it's opened in text mode, so that Python's
+       universal newlines handling splits lines the same way that pandas does
+       (e.g. files with \\r-only line endings, as exported from some versions
+       of Excel, still have their #q2: lines detected). Binary file objects
+       (e.g. BytesIOs) are wrapped in an io.TextIOWrapper for the same reason.
+       We explicitly use UTF-8 since that's what pandas would use if we just
+       passed it the filename.
+
+       Any extra keyword arguments are passed on to pandas.read_csv(). (sep
+       and skiprows are set by this function, so they shouldn't be passed.)
+    """
+
+    def read_file_obj(file_obj):
+        q2_lines = get_q2_comment_lines(file_obj)
+        return pd.read_csv(
+            file_obj, sep="\t", skiprows=q2_lines, **read_csv_kwargs
+        )
+
+    if hasattr(file_loc, "read"):
+        if isinstance(file_loc, io.TextIOBase):
+            return read_file_obj(file_loc)
+        text_file_obj = io.TextIOWrapper(file_loc, encoding="utf-8")
+        try:
+            return read_file_obj(text_file_obj)
+        finally:
+            # Detach the wrapper so that it doesn't close file_loc when it's
+            # garbage collected -- the caller still owns file_loc.
+            text_file_obj.detach()
     else:
-        with open(md_file_loc, "r") as md_file_obj:
-            return iterate_over_file_obj_lines(md_file_obj)
+        with open(file_loc, "r", encoding="utf-8") as file_obj:
+            return read_file_obj(file_obj)
 
 
 def read_metadata_file(md_file_loc):
@@ -74,24 +107,22 @@ def read_metadata_file(md_file_loc):
        This treats all metadata values (including the index column) as
        strings, due to the use of dtype=object.
     """
-    q2_lines = get_q2_comment_lines(md_file_loc)
-    metadata_df = pd.read_csv(
-        md_file_loc,
-        sep="\t",
-        na_values=[""],
-        keep_default_na=False,
-        dtype=object,
-        skiprows=q2_lines,
+    metadata_df = read_tsv_without_q2_comments(
+        md_file_loc, na_values=[""], keep_default_na=False, dtype=object
     )
 
     # Take care of leading/trailing whitespace
-    for column in metadata_df.columns:
+    for column, values in metadata_df.items():
         # Strip surrounding whitespace from each value
         # This mimics how QIIME 2 ignores this whitespace
-        metadata_df[column] = metadata_df[column].str.strip()
-    # Sorta the opposite of replace_nan(). Find all of the ""s resulting from
-    # removing values with just-whitespace, and convert them to NaNs.
-    metadata_df.where(metadata_df != "", np.NaN, inplace=True)
+        stripped_values = values.str.strip()
+        # Sorta the opposite of replace_nan(). Find all of the ""s resulting
+        # from removing values with just-whitespace, and convert them to NaNs.
+        # (We do this one column at a time, right after stripping, rather than
+        # building a boolean DataFrame for the entire metadata file.)
+        metadata_df[column] = stripped_values.where(
+            stripped_values != "", np.NaN
+        )
 
     # If there are any NaNs in the first column (that will end up being the
     # index column), then the user supplied at least one empty ID
@@ -99,7 +130,8 @@ def read_metadata_file(md_file_loc):
     #
     # This is obviously terrible, so just raise an error (this sort of
     # situation also results in an error from qiime2.Metadata).
-    if metadata_df[metadata_df.columns[0]].isna().any():
+    id_column = metadata_df.columns[0]
+    if metadata_df[id_column].isna().any():
         raise ValueError("Empty ID found in metadata file.")
 
     # Instead of passing index_col=0 to pd.read_csv(), we delay setting the
@@ -113,5 +145,5 @@ def read_metadata_file(md_file_loc):
     # pandas).
     #
     # This workaround should address this.
-    metadata_df.set_index(metadata_df.columns[0], inplace=True)
+    metadata_df.set_index(id_column, inplace=True)
     return metadata_df
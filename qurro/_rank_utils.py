@@ -9,9 +9,10 @@
 
 import logging
 import skbio
+import numpy as np
 import pandas as pd
 from qurro._df_utils import escape_columns
-from qurro._metadata_utils import get_q2_comment_lines
+from qurro._metadata_utils import read_tsv_without_q2_comments
 
 
 def read_rank_file(file_loc):
@@ -61,13 +62,8 @@ def differentials_to_df(differentials_loc):
 
     # As of QIIME 2 2019.7, differentials exported from QIIME 2 can have q2
     # comments! So we need to detect these.
-    q2_lines = get_q2_comment_lines(differentials_loc)
-    differentials = pd.read_csv(
-        differentials_loc,
-        sep="\t",
-        na_filter=False,
-        dtype=object,
-        skiprows=q2_lines,
+    differentials = read_tsv_without_q2_comments(
+        differentials_loc, na_filter=False, dtype=object
     )
     # Delay setting index column so we can first load it as an object (this
     # saves us from situations where the index col would otherwise be read as a
@@ -80,26 +76,46 @@ def differentials_to_df(differentials_loc):
     # doesn't check column names, and I want it to do that...)
     differentials.index.rename(None, inplace=True)
 
-    # This is slow but it should at least *work as intended.*
     # If there are any non-numeric differentials, or any NaN differentials, or
     # any infinity/-infinity differentials (???), then we should raise an
     # error. This code should do that.
-    for feature_row in differentials.itertuples():
-        for differential in feature_row[1:]:
-            try:
-                fd = float(differential)
-                if pd.isna(fd) or fd == float("inf") or fd == float("-inf"):
-                    raise ValueError
-            except ValueError:
-                raise ValueError(
-                    "Missing / nonnumeric differential(s) found for feature "
-                    "{}".format(feature_row[0])
-                )
-
-    # Now, we should be able to do this freely.
-    for column in differentials.columns:
-        differentials[column] = differentials[column].astype(float)
-    return differentials
+    #
+    # We try to convert all of the differentials to floats at once. If that
+    # fails, at least one differential is non-numeric -- in that case we fall
+    # back to checking each feature individually, so that we can tell the
+    # user which feature caused the problem. (This check also looks for
+    # NaN/infinity differentials, so that the first bad feature in the file
+    # is the one reported -- even if it's bad due to a NaN rather than a
+    # non-numeric value.)
+    try:
+        float_differentials = differentials.astype(float)
+    except ValueError:
+        for feature_row in differentials.itertuples():
+            for differential in feature_row[1:]:
+                try:
+                    fd = float(differential)
+                except ValueError:
+                    raise_bad_differential_error(feature_row[0])
+                if not np.isfinite(fd):
+                    raise_bad_differential_error(feature_row[0])
+        # We shouldn't ever get here, but just in case
+        raise
+
+    # Now we can check for NaN/infinity differentials without looping in
+    # Python.
+    bad_features = ~np.isfinite(float_differentials).all(axis="columns")
+    if bad_features.any():
+        raise_bad_differential_error(bad_features.idxmax())
+
+    return float_differentials
+
+
+def raise_bad_differential_error(feature_id):
+    """Raises a ValueError about a feature with a bad differential."""
+    raise ValueError(
+        "Missing / nonnumeric differential(s) found for feature "
+        "{}".format(feature_id)
+    )
 
 
 def filter_unextreme_features(
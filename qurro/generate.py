@@ -15,9 +15,9 @@
 # ----------------------------------------------------------------------------
 
 import os
+import shutil
 import logging
 
-from distutils.dir_util import copy_tree
 import pandas as pd
 import altair as alt
 from qurro._rank_utils import filter_unextreme_features
@@ -34,10 +34,19 @@ from qurro._df_utils import (
     remove_empty_samples_and_features,
     match_table_and_data,
     merge_feature_metadata,
-    sparsify_count_dict,
+    table_to_sparse_count_dict,
     add_sample_presence_count,
 )
 
+# The location of support_files/, which contains the HTML/JS/CSS/etc. used in
+# Qurro visualizations. We figure this out once, when this module is imported:
+# support_files/ is located within the same directory as this file
+# (generate.py), so we just join the location of this file with
+# "support_files".
+SUPPORT_FILES_LOC = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "support_files"
+)
+
 
 def process_and_generate(
     feature_ranks,
@@ -443,6 +452,36 @@ def gen_sample_plot(metadata):
     return sample_chart_dict
 
 
+def copy_support_files(support_files_loc, output_dir):
+    """Recursively copies the contents of support_files_loc to output_dir.
+
+       We explictly ignore files starting with a period, like .DS_STORE. It's
+       ok if these files make their way into the output directory -- they
+       shouldn't mess anything up -- but there's no need to include them.
+
+       This creates output_dir (and any subdirectories) if they don't already
+       exist. (When Qurro is running as a QIIME 2 plugin, output_dir already
+       exists and we need to write stuff to it -- this is because output_dir
+       is actually a temporary folder that QIIME 2 creates.) This is why we
+       don't just use shutil.copytree(), which throws an error if output_dir
+       already exists.
+
+       We use os.scandir() to iterate over the directory, since it gives us
+       each entry's name, path, and type without needing extra stat() calls.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # (We don't use os.scandir() as a context manager, since that isn't
+    # supported in Python 3.5.)
+    for entry in os.scandir(support_files_loc):
+        if entry.name.startswith("."):
+            continue
+        dest = os.path.join(output_dir, entry.name)
+        if entry.is_dir():
+            copy_support_files(entry.path, dest)
+        else:
+            shutil.copyfile(entry.path, dest)
+
+
 def gen_visualization(
     V,
     rank_type,
@@ -472,28 +511,12 @@ def gen_visualization(
     logging.debug("Generating sample plot JSON.")
     sample_plot_json = gen_sample_plot(df_sample_metadata)
     logging.debug("Generating count data JSON.")
-    count_json = sparsify_count_dict(processed_table.T.to_dict())
+    count_json = table_to_sparse_count_dict(processed_table)
     logging.debug("Finished generating all JSONs.")
 
     # Copy support_files/ for the Qurro visualization to the output directory
-    # First, identify the location of this particular file (generate.py).
-    curr_loc = os.path.dirname(os.path.realpath(__file__))
-    # Next, join curr_loc with support_files/, since support_files/ is located
-    # within the same directory as this fiile (generate.py).
-    support_files_loc = os.path.join(curr_loc, "support_files")
-    # Finally, actually do the copying (saving the index path for future use)
-    # We explictly ignore files starting with a period, like .DS_STORE. It's ok
-    # if these files make their way into the output directory -- they shouldn't
-    # mess anything up -- but there's no need to include them.
-
-    # copy_tree() creates the output directory if it doesn't already exist.
-    # (When Qurro is running as a QIIME 2 plugin, output_dir already exists and
-    # we need to write stuff to it -- this is because output_dir is actually a
-    # temporary folder that QIIME 2 creates.)
-    # NOTE: Use of copy_tree() instead of shutil.copytree() (which throws an
-    # error if output_dir already exists) is based on how
-    # emperor.core.copy_support_files() works.
-    copy_tree(support_files_loc, output_dir)
+    # (saving the index path for future use)
+    copy_support_files(SUPPORT_FILES_LOC, output_dir)
     index_path = os.path.join(output_dir, "index.html")
 
     # Write the plot and count JSONs to main.js so that they're loaded when
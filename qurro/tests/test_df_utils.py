@@ -1,16 +1,17 @@
 import pytest
-from pandas import DataFrame, Series
+from pandas import DataFrame, SparseDataFrame, Series
 from pandas.testing import assert_frame_equal, assert_series_equal
 import numpy as np
 from qurro._df_utils import (
     ensure_df_headers_unique,
     validate_df,
+    fix_id,
     replace_nan,
     remove_empty_samples_and_features,
     print_if_dropped,
     match_table_and_data,
     merge_feature_metadata,
-    sparsify_count_dict,
+    table_to_sparse_count_dict,
     check_column_names,
     add_sample_presence_count,
     vibe_check,
@@ -126,6 +127,19 @@ def test_validate_df():
         validate_df(nonuniqueColRowDF, "Non-unique-column-and-row DF", 3, 2)
 
 
+def test_fix_id():
+    """Tests fix_id()."""
+
+    assert fix_id("abc") == "abc"
+    assert fix_id("") == ""
+    assert fix_id("a.b.c") == "a:b:c"
+    assert fix_id("[x]") == "(x)"
+    assert fix_id("\\") == "|"
+    # Quotes should just be removed
+    assert fix_id("'single' \"double\"") == "single double"
+    assert fix_id("p__[Thermi].'o\\\"") == "p__(Thermi):o|"
+
+
 def test_replace_nan():
     """Tests replace_nan()."""
 
@@ -466,33 +480,67 @@ def test_merge_feature_metadata():
         merge_feature_metadata(ranks, fm)
 
 
-def test_sparsify_count_dict():
+def test_table_to_sparse_count_dict():
+    """Tests table_to_sparse_count_dict()."""
 
     # Test that it works in basic case
-    test_cts = {
-        "Feature 1": {"Sample 1": 0, "Sample 2": 3, "Sample 3": 0},
-        "Feature 2": {"Sample 1": 2, "Sample 2": 4, "Sample 3": 0},
-    }
-    assert sparsify_count_dict(test_cts) == {
-        "Feature 1": {"Sample 2": 3},
-        "Feature 2": {"Sample 1": 2, "Sample 2": 4},
+    table, _, _ = get_test_data()
+    expected = {
+        "F1": {"Sample1": 1, "Sample2": 8, "Sample3": 1},
+        "F2": {"Sample1": 2, "Sample2": 7},
+        "F3": {"Sample1": 3, "Sample2": 6},
+        "F4": {"Sample1": 4, "Sample2": 5, "Sample4": 1},
+        "F5": {"Sample1": 5, "Sample2": 4},
+        "F6": {"Sample1": 6, "Sample2": 3},
+        "F7": {"Sample1": 7, "Sample2": 2},
+        "F8": {"Sample1": 8, "Sample2": 1},
     }
+    assert table_to_sparse_count_dict(table) == expected
+
+    # Test that SparseDataFrames are handled the same way
+    table_sdf = SparseDataFrame(table, default_fill_value=0.0)
+    assert table_to_sparse_count_dict(table_sdf) == expected
 
     # Test that it works even when the data is inherently dense (i.e. no zeros)
-    test_cts = {
+    dense_table = DataFrame(
+        {"Sample 1": [1, 2], "Sample 2": [3, 4], "Sample 3": [5, 6]},
+        index=["Feature 1", "Feature 2"],
+    )
+    expected_dense = {
         "Feature 1": {"Sample 1": 1, "Sample 2": 3, "Sample 3": 5},
         "Feature 2": {"Sample 1": 2, "Sample 2": 4, "Sample 3": 6},
     }
-    assert sparsify_count_dict(test_cts) == test_cts
+    assert table_to_sparse_count_dict(dense_table) == expected_dense
+    dense_table_sdf = SparseDataFrame(dense_table, default_fill_value=0.0)
+    assert table_to_sparse_count_dict(dense_table_sdf) == expected_dense
+
+    # Test that features with only zero counts are still included
+    table["Sample1"] = 0
+    table["Sample2"] = 0
+    expected_empty = {
+        "F1": {"Sample3": 1},
+        "F2": {},
+        "F3": {},
+        "F4": {"Sample4": 1},
+        "F5": {},
+        "F6": {},
+        "F7": {},
+        "F8": {},
+    }
+    assert table_to_sparse_count_dict(table) == expected_empty
+    table_sdf = SparseDataFrame(table, default_fill_value=0.0)
+    assert table_to_sparse_count_dict(table_sdf) == expected_empty
 
     # Test that it works even when the data is totally sparse
     # This should never happen, since we filter out empty features, but good to
     # be sure
-    test_cts = {
-        "Feature 1": {"Sample 1": 0, "Sample 2": 0, "Sample 3": 0},
-        "Feature 2": {"Sample 1": 0, "Sample 2": 0, "Sample 3": 0},
+    table["Sample3"] = 0
+    table["Sample4"] = 0
+    assert table_to_sparse_count_dict(table) == {f: {} for f in table.index}
+    table_sdf = SparseDataFrame(table, default_fill_value=0.0)
+    assert table_to_sparse_count_dict(table_sdf) == {
+        f: {} for f in table.index
     }
-    assert sparsify_count_dict(test_cts) == {"Feature 1": {}, "Feature 2": {}}
 
 
 def test_check_column_names():
@@ -71,3 +71,31 @@ def test_differentials_to_df_bad_cases():
     )
     with pytest.raises(ValueError):
         differentials_to_df(ninf_val_diff)
+
+
+def test_differentials_to_df_first_bad_feature_reported():
+    """Tests that the first "bad" feature is the one that gets reported,
+       regardless of why each feature is bad.
+    """
+
+    # A NaN feature before a non-numeric feature
+    nan_then_nonnumeric_diff = StringIO(
+        "\tIntercept\tRank 1\nf1\tNaN\t2.0\nf2\tabc\t4.0\nf3\t5.0\t6.0"
+    )
+    with pytest.raises(ValueError, match="for feature f1$"):
+        differentials_to_df(nan_then_nonnumeric_diff)
+
+    # A non-numeric feature before an infinity feature
+    nonnumeric_then_inf_diff = StringIO(
+        "\tIntercept\tRank 1\nf1\t1.0\t2.0\nf2\tabc\t4.0\nf3\tinf\t6.0"
+    )
+    with pytest.raises(ValueError, match="for feature f2$"):
+        differentials_to_df(nonnumeric_then_inf_diff)
+
+    # Just NaN/infinity features (so the vectorized check is what catches
+    # these)
+    inf_then_nan_diff = StringIO(
+        "\tIntercept\tRank 1\nf1\t1.0\t2.0\nf2\t-Infinity\t4.0\nf3\tNaN\t6.0"
+    )
+    with pytest.raises(ValueError, match="for feature f2$"):
+        differentials_to_df(inf_then_nan_diff)
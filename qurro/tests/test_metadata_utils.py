@@ -1,11 +1,16 @@
 import os
+from io import StringIO, BytesIO, TextIOWrapper
 import pytest
 from pandas import Index
 from pandas.testing import assert_frame_equal
 from pandas.errors import ParserError
 import qiime2
 from qurro._df_utils import replace_nan
-from qurro._metadata_utils import read_metadata_file
+from qurro._metadata_utils import (
+    get_q2_comment_lines,
+    read_tsv_without_q2_comments,
+    read_metadata_file,
+)
 
 
 def test_read_metadata_file_basic():
@@ -206,3 +211,78 @@ def test_read_metadata_file_nan_id():
 
     with pytest.raises(qiime2.metadata.MetadataFileError):
         qiime2.Metadata.load(ni)
+
+
+def test_read_metadata_file_cr_line_endings(tmp_path):
+    """Tests that #q2: lines are skipped in files with \\r line endings.
+
+       (Some programs, e.g. older versions of Excel, export files that use
+       just \\r to end lines.)
+    """
+    cr = tmp_path / "cr_line_endings.tsv"
+    with open(str(cr), "w", newline="") as cr_file:
+        cr_file.write("id\tcol\r#q2:types\tcategorical\rs1\t a \rs2\tb\r")
+    cr_df = read_metadata_file(str(cr))
+    assert cr_df.index.equals(Index(["s1", "s2"]))
+    assert cr_df.at["s1", "col"] == "a"
+    assert cr_df.at["s2", "col"] == "b"
+
+    assert_frame_equal(
+        replace_nan(cr_df),
+        replace_nan(qiime2.Metadata.load(str(cr)).to_dataframe()),
+    )
+
+
+def test_get_q2_comment_lines_bytesio():
+    """Tests that get_q2_comment_lines() works with binary file objects, once
+       they've been wrapped in an io.TextIOWrapper (which
+       read_tsv_without_q2_comments() does automatically).
+    """
+
+    md = BytesIO(
+        b"id\tcol\n#q2:types\tcategorical\n#q2:other\tx\ns1\ta\n#q2:no\tb\n"
+    )
+    md_text = TextIOWrapper(md, encoding="utf-8")
+    assert get_q2_comment_lines(md_text) == [1, 2]
+    # The file object should have been seeked back to where it started
+    assert md_text.tell() == 0
+    md_text.detach()
+
+    md_df = read_tsv_without_q2_comments(md, dtype=object)
+    assert list(md_df.columns) == ["id", "col"]
+    assert list(md_df["id"]) == ["s1", "#q2:no"]
+    assert list(md_df["col"]) == ["a", "b"]
+    # read_tsv_without_q2_comments() shouldn't have closed the BytesIO
+    assert not md.closed
+
+    # Binary file objects with \r-only line endings should get the same
+    # universal newlines handling as files opened by filename
+    cr_md = BytesIO(b"id\tcol\r#q2:types\tcategorical\rs1\ta\r")
+    cr_md_text = TextIOWrapper(cr_md, encoding="utf-8")
+    assert get_q2_comment_lines(cr_md_text) == [1]
+    cr_md_text.detach()
+
+    cr_md.seek(0)
+    cr_md_df = read_tsv_without_q2_comments(cr_md, dtype=object)
+    assert list(cr_md_df["id"]) == ["s1"]
+    assert list(cr_md_df["col"]) == ["a"]
+    assert not cr_md.closed
+
+
+def test_get_q2_comment_lines_stringio_not_at_start():
+    """Tests that get_q2_comment_lines() works with a file object that isn't
+       at position 0, and that the file object is seeked back to where it was
+       (rather than to position 0).
+    """
+
+    prefix = "this line isn't part of the TSV\n"
+    md = StringIO(prefix + "id\tcol\n#q2:types\tcategorical\ns1\ta\ns2\tb\n")
+    md.seek(len(prefix))
+    # Line numbers should be relative to where the file object was
+    assert get_q2_comment_lines(md) == [1]
+    assert md.tell() == len(prefix)
+
+    md_df = read_tsv_without_q2_comments(md, dtype=object)
+    assert list(md_df.columns) == ["id", "col"]
+    assert list(md_df["id"]) == ["s1", "s2"]
+    assert list(md_df["col"]) == ["a", "b"]